@@ -13,26 +13,54 @@
 
 from __future__ import annotations
 
+import hashlib
+import io
+import os
 import re
-import html
+from dataclasses import dataclass
 from datetime import date
-from typing import List, Dict, Optional
-from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 
+import pandas as pd
 import streamlit as st
 from streamlit.components.v1 import html as st_html
+from jinja2 import DictLoader, Environment, FileSystemBytecodeCache
+from markupsafe import Markup
 
 
 # =========================
 # ユーティリティ
 # =========================
-def escape_nl2br(text: str) -> str:
-    """HTMLエスケープ + 改行を <br> に変換"""
-    if text is None:
+# auto_monogram 用：姓・名の区切り（半角/全角スペース）
+_MONO_SPLIT = re.compile(r"[ \u3000]+")
+
+# html.escape(quote=True) と同じ置換 + 改行→<br> を1回の走査で行う変換表
+_HTML_NL_TABLE = str.maketrans({
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    '"': "&quot;",
+    "'": "&#x27;",
+    "\n": "<br>",
+})
+
+
+def _esc(text: Optional[str]) -> str:
+    """HTMLエスケープ + 改行を <br> に変換（None/空文字は走査せずに "" を返す）"""
+    if not text:
         return ""
-    return html.escape(text).replace("\n", "<br>")
+    return text.translate(_HTML_NL_TABLE)
 
 
+@lru_cache(maxsize=512)
+def _esc_cached(text: str) -> str:
+    """氏名・所属・略歴など、毎週同じ値が繰り返し出る短い文字列用の _esc"""
+    return text.translate(_HTML_NL_TABLE) if text else ""
+
+
+@lru_cache(maxsize=512)
 def auto_monogram(full_name: str) -> str:
     """
     氏名からモノグラム（丸アイコンに表示する1文字）を自動抽出。
@@ -41,34 +69,42 @@ def auto_monogram(full_name: str) -> str:
     """
     if not full_name:
         return "名"
-    tokens = re.split(r"[ \u3000]+", full_name.strip())
+    tokens = _MONO_SPLIT.split(full_name.strip())
     if tokens and tokens[0]:
         return tokens[0][0]
     return full_name.strip()[0]
 
 
+_FMT_YMD = "📅 {0.year}年{0.month}月{0.day}日配信号"
+_FMT_MD = "📅 {0.month}月{0.day}日配信号"
+
+
 def format_delivery_date(d: date, style: str) -> str:
     """配信日の表記を生成。"""
-    if style == "YMD":
-        return f"📅 {d.year}年{d.month}月{d.day}日配信号"
-    return f"📅 {d.month}月{d.day}日配信号"
+    return (_FMT_YMD if style == "YMD" else _FMT_MD).format(d)
+
+
+# 2色交互（色を増やす場合は color_cycle を idx % len(...) に戻すこと）
+_STRIP_PALETTE = ("#c7d2fe", "#a5b4fc")
 
 
 def color_cycle(idx: int) -> str:
     """カード上部ストリップ色の既定サイクル。"""
-    palette = ["#c7d2fe", "#a5b4fc"]
-    return palette[idx % len(palette)]
+    return _STRIP_PALETTE[idx & 1]
 
 
-def ensure_state(key: str, default):
-    """st.session_state に key が無ければ default をセット"""
-    if key not in st.session_state:
-        st.session_state[key] = default
+def ensure_states(defaults: Dict[str, object]) -> None:
+    """st.session_state に無い key だけ defaults の値をまとめてセット"""
+    ss = st.session_state
+    for key, default in defaults.items():
+        if key not in ss:
+            ss[key] = default
 
 
 # =========================
 # デフォルトのコメンテーター定義
 # =========================
+@st.cache_data(show_spinner=False)
 def get_default_commentators() -> List[Dict[str, object]]:
     """
     デフォルト7名。3番は要件に合わせて
@@ -124,43 +160,57 @@ def get_default_commentators() -> List[Dict[str, object]]:
 
 
 # =========================
-# HTMLレンダリング（単一カード）
+# 集約カード内のコメント1件分
 # =========================
-def render_card(
-    idx: int,
-    issue_label: str,
-    article_title: str,
-    comment_text: str,
-    commenter_name: str,
-    commenter_org: str,
-    link_url: str,
-    strip_color: str,
-    monogram: Optional[str] = None,
-    comment_bar_color: str = "#2563eb",
-    commenter_bio: str = "",
-) -> str:
-    """1枚のカード（記事＋単一コメント）HTMLを返す。"""
-    _issue_label = escape_nl2br(issue_label)
-    _article_title = escape_nl2br(article_title)
-    _comment_text = escape_nl2br(comment_text)
-    _commenter_name = escape_nl2br(commenter_name)
-    _commenter_org = escape_nl2br(commenter_org)
-    _commenter_bio = escape_nl2br(commenter_bio or "")
-    _link_url = (link_url or f"#article{idx+1}").strip()
-    _strip_color = strip_color or color_cycle(idx)
-    _mono = (monogram or auto_monogram(commenter_name)).strip()[:1] or "名"
-
-    bio_html = (
-        f'<div style="color:#94a3b8;font:12px/1.6 Arial,\'Hiragino Kaku Gothic ProN\',Meiryo,sans-serif;'
-        f'word-break:break-word;margin-top:2px;">{_commenter_bio}</div>'
-        if _commenter_bio
-        else ""
-    )
+@dataclass(frozen=True, slots=True)
+class Entry:
+    comment: str = ""
+    name: str = ""
+    org: str = ""
+    bio: str = ""
+    monogram: str = ""
+    comment_bar_color: str = "#2563eb"
 
-    card_html = f"""
+
+# =========================
+# HTMLテンプレート（Jinja2）
+# =========================
+# 氏名・所属・略歴＋モノグラムの行は単一カード／集約カードで共通のマクロにする
+MACROS_TPL = """
+{% macro commenter_line(name, org, bio, mono) %}
+  <table role="presentation" cellpadding="0" cellspacing="0" border="0">
+    <tbody><tr>
+      <td style="width:1%;vertical-align:middle;">
+        <div style="width:40px;height:40px;max-width:40px;min-width:40px;border-radius:50%;
+                    background:#eef2f7;color:#64748b;
+                    font:700 18px Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;
+                    line-height:40px;text-align:center;">
+          {{ mono }}
+        </div>
+      </td>
+      <td style="width:12px;"></td>
+      <td style="color:#0f172a;font:600 15px/1.3 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">
+        <table role="presentation" cellpadding="0" cellspacing="0" border="0">
+          <tbody><tr>
+            <td style="white-space:nowrap;vertical-align:baseline;color:#0f172a;font:600 15px/1.3 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">{{ name|nl2br_cached }}</td>
+            <td style="width:10px;"></td>
+            <td style="vertical-align:baseline;color:#64748b;font:13px/1.4 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;word-break:break-word;">{{ org|nl2br_cached }}</td>
+          </tr></tbody>
+        </table>
+        {% if bio %}
+        <div style="color:#94a3b8;font:12px/1.6 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;word-break:break-word;margin-top:2px;">{{ bio|nl2br_cached }}</div>
+        {% endif %}
+      </td>
+    </tr></tbody>
+  </table>
+{% endmacro %}
+"""
+
+CARD_TPL = """
+{% from "macros" import commenter_line %}
     <table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0" style="background:#ffffff;border:1px solid #e5e7eb;border-radius:12px;">
       <tbody>
-        <tr><td style="height:4px;background:{_strip_color};border-top-left-radius:12px;border-top-right-radius:12px;"></td></tr>
+        <tr><td style="height:4px;background:{{ strip_color }};border-top-left-radius:12px;border-top-right-radius:12px;"></td></tr>
 
         <!-- 見出し：号数 + 記事タイトル -->
         <tr>
@@ -168,8 +218,8 @@ def render_card(
             <table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0">
               <tbody><tr>
                 <td style="text-align:left;">
-                  <span style="display:inline-block;vertical-align:middle;white-space:nowrap;color:#475569;font-weight:600;font-size:13px;line-height:13px;">{_issue_label}</span>
-                  <span style="display:inline-block;vertical-align:middle;margin-left:6px;color:#0f172a;font-weight:700;font-size:19px;line-height:19px;word-break:break-word;">{_article_title}</span>
+                  <span style="display:inline-block;vertical-align:middle;white-space:nowrap;color:#475569;font-weight:600;font-size:13px;line-height:13px;">{{ issue_label|nl2br }}</span>
+                  <span style="display:inline-block;vertical-align:middle;margin-left:6px;color:#0f172a;font-weight:700;font-size:19px;line-height:19px;word-break:break-word;">{{ article_title|nl2br }}</span>
                 </td>
               </tr></tbody>
             </table>
@@ -181,8 +231,8 @@ def render_card(
           <td style="padding:10px 20px 6px 20px;">
             <table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0">
               <tbody><tr>
-                <td style="width:6px;background:{comment_bar_color};"></td>
-                <td style="padding:8px 0 8px 12px;color:#334155;font:15px/1.8 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">{_comment_text}</td>
+                <td style="width:6px;background:{{ comment_bar_color }};"></td>
+                <td style="padding:8px 0 8px 12px;color:#334155;font:15px/1.8 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">{{ comment_text|nl2br }}</td>
               </tr></tbody>
             </table>
           </td>
@@ -190,29 +240,7 @@ def render_card(
 
         <tr>
           <td style="padding:2px 20px 0 20px;">
-            <table role="presentation" cellpadding="0" cellspacing="0" border="0">
-              <tbody><tr>
-                <td style="width:1%;vertical-align:middle;">
-                  <div style="width:40px;height:40px;max-width:40px;min-width:40px;border-radius:50%;
-                              background:#eef2f7;color:#64748b;
-                              font:700 18px Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;
-                              line-height:40px;text-align:center;">
-                    {_mono}
-                  </div>
-                </td>
-                <td style="width:12px;"></td>
-                <td style="color:#0f172a;font:600 15px/1.3 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">
-                  <table role="presentation" cellpadding="0" cellspacing="0" border="0">
-                    <tbody><tr>
-                      <td style="white-space:nowrap;vertical-align:baseline;color:#0f172a;font:600 15px/1.3 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">{_commenter_name}</td>
-                      <td style="width:10px;"></td>
-                      <td style="vertical-align:baseline;color:#64748b;font:13px/1.4 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;word-break:break-word;">{_commenter_org}</td>
-                    </tr></tbody>
-                  </table>
-                  {bio_html}
-                </td>
-              </tr></tbody>
-            </table>
+            {{ commenter_line(commenter_name, commenter_org, commenter_bio, mono) }}
           </td>
         </tr>
 
@@ -221,7 +249,7 @@ def render_card(
             <table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0">
               <tbody><tr>
                 <td style="background:#e8f0ff;border:1px solid #c7d2fe;border-radius:8px;">
-                  <a href="{_link_url}" target="_blank" rel="noopener noreferrer"
+                  <a href="{{ link_url }}" target="_blank" rel="noopener noreferrer"
                      style="display:block;width:100%;text-align:center;color:#1d4ed8;text-decoration:none;font:700 15px/1 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;padding:12px 18px;border-radius:8px;">
                     記事を読む
                   </a>
@@ -232,101 +260,13 @@ def render_card(
         </tr>
       </tbody>
     </table>
-    """
-    return card_html
-
-
-# =========================
-# HTMLレンダリング（複数コメントを1枚に集約）
-# =========================
-def render_card_grouped(
-    idx: int,
-    issue_label: str,
-    article_title: str,
-    link_url: str,
-    strip_color: str,
-    entries: List[Dict[str, str]],  # {comment, name, org, bio, monogram, comment_bar_color}
-) -> str:
-    _issue_label = escape_nl2br(issue_label)
-    _article_title = escape_nl2br(article_title)
-    _link_url = (link_url or f"#article{idx+1}").strip()
-    _strip_color = strip_color or color_cycle(idx)
-
-    commentators = [escape_nl2br(e.get("name", "")) for e in entries]
-    monograms = [(e.get("monogram") or auto_monogram(e.get("name", "")))[:1] or "名" for e in entries]
-
-    chips_html = "".join(
-        f"""<div style="width:28px;height:28px;border-radius:50%;background:#eef2f7;color:#64748b;
-                    font:700 14px/28px Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;
-                    text-align:center;display:inline-block;margin-right:6px;">{m}</div>"""
-        for m in monograms[:5]
-    )
-    more_badge = ""
-    if len(monograms) > 5:
-        more_badge = f"""<span style="display:inline-block;margin-left:4px;color:#475569;
-                          font:600 12px/1 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">+{len(monograms)-5}</span>"""
-
-    # 各コメントブロック
-    comment_blocks = []
-    for e in entries:
-        _comment = escape_nl2br(e.get("comment", ""))
-        _name = escape_nl2br(e.get("name", ""))
-        _org = escape_nl2br(e.get("org", ""))
-        _bio = escape_nl2br(e.get("bio", "") or "")
-        _mono = (e.get("monogram") or auto_monogram(e.get("name", "")))[:1] or "名"
-        bar = e.get("comment_bar_color") or "#2563eb"
-
-        bio_html = (
-            f"<div style=\"color:#94a3b8;font:12px/1.6 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;"
-            f"word-break:break-word;margin-top:2px;\">{_bio}</div>"
-            if _bio
-            else ""
-        )
-
-        block = f"""
-        <tr><td style="padding:10px 20px 0 20px;">
-          <table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0">
-            <tbody>
-              <tr>
-                <td style="width:6px;background:{bar};"></td>
-                <td style="padding:10px 0 10px 12px;color:#334155;font:15px/1.8 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">{_comment}</td>
-              </tr>
-            </tbody>
-          </table>
-        </td></tr>
-
-        <tr><td style="padding:2px 20px 10px 20px;">
-          <table role="presentation" cellpadding="0" cellspacing="0" border="0">
-            <tbody><tr>
-              <td style="width:1%;vertical-align:middle;">
-                <div style="width:40px;height:40px;border-radius:50%;background:#eef2f7;color:#64748b;
-                            font:700 18px Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;line-height:40px;text-align:center;">
-                  {_mono}
-                </div>
-              </td>
-              <td style="width:12px;"></td>
-              <td style="color:#0f172a;font:600 15px/1.3 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">
-                <table role="presentation" cellpadding="0" cellspacing="0" border="0">
-                  <tbody><tr>
-                    <td style="white-space:nowrap;vertical-align:baseline;color:#0f172a;font:600 15px/1.3 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">{_name}</td>
-                    <td style="width:10px;"></td>
-                    <td style="vertical-align:baseline;color:#64748b;font:13px/1.4 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;word-break:break-word;">{_org}</td>
-                  </tr></tbody>
-                </table>
-                {bio_html}
-              </td>
-            </tr></tbody>
-          </table>
-        </td></tr>
-        """
-        comment_blocks.append(block)
-
-    comments_html = "\n<tr><td style=\"height:10px;\"></td></tr>\n".join(comment_blocks)
+"""
 
-    return f"""
+GROUPED_TPL = """
+{% from "macros" import commenter_line %}
     <table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0" style="background:#ffffff;border:1px solid #e5e7eb;border-radius:12px;">
       <tbody>
-        <tr><td style="height:4px;background:{_strip_color};border-top-left-radius:12px;border-top-right-radius:12px;"></td></tr>
+        <tr><td style="height:4px;background:{{ strip_color }};border-top-left-radius:12px;border-top-right-radius:12px;"></td></tr>
 
         <!-- 見出し（左=号数+タイトル / 右=複数コメントバッジ） -->
         <tr>
@@ -334,23 +274,51 @@ def render_card_grouped(
             <table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0">
               <tbody><tr>
                 <td style="text-align:left;">
-                  <span style="display:inline-block;vertical-align:middle;white-space:nowrap;color:#475569;font-weight:600;font-size:13px;line-height:13px;">{_issue_label}</span>
-                  <span style="display:inline-block;vertical-align:middle;margin-left:6px;color:#0f172a;font-weight:700;font-size:19px;line-height:19px;word-break:break-word;">{_article_title}</span>
+                  <span style="display:inline-block;vertical-align:middle;white-space:nowrap;color:#475569;font-weight:600;font-size:13px;line-height:13px;">{{ issue_label|nl2br }}</span>
+                  <span style="display:inline-block;vertical-align:middle;margin-left:6px;color:#0f172a;font-weight:700;font-size:19px;line-height:19px;word-break:break-word;">{{ article_title|nl2br }}</span>
                 </td>
                 <td style="text-align:right;white-space:nowrap;">
                   <span style="display:inline-block;background:#f1f5ff;border:1px solid #c7d2fe;color:#1d4ed8;font-weight:700;font-size:12px;padding:6px 10px;border-radius:14px;">
-                    {len(entries)}件 / {len(set(commentators))}名
+                    {{ entries|length }}件 / {{ num_commentators }}名
                   </span>
                 </td>
               </tr></tbody>
             </table>
 
-            <div style="margin-top:8px;">{chips_html}{more_badge}</div>
+            <div style="margin-top:8px;">
+              {%- for e in entries[:5] -%}
+              <div style="width:28px;height:28px;border-radius:50%;background:#eef2f7;color:#64748b;
+                    font:700 14px/28px Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;
+                    text-align:center;display:inline-block;margin-right:6px;">{{ e.mono }}</div>
+              {%- endfor -%}
+              {%- if entries|length > 5 -%}
+              <span style="display:inline-block;margin-left:4px;color:#475569;
+                          font:600 12px/1 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">+{{ entries|length - 5 }}</span>
+              {%- endif -%}
+            </div>
           </td>
         </tr>
 
         <!-- コメント群 -->
-        {comments_html}
+        {% for e in entries %}
+        <tr><td style="padding:10px 20px 0 20px;">
+          <table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0">
+            <tbody>
+              <tr>
+                <td style="width:6px;background:{{ e.bar }};"></td>
+                <td style="padding:10px 0 10px 12px;color:#334155;font:15px/1.8 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">{{ e.comment|nl2br }}</td>
+              </tr>
+            </tbody>
+          </table>
+        </td></tr>
+
+        <tr><td style="padding:2px 20px 10px 20px;">
+          {{ commenter_line(e.name, e.org, e.bio, e.mono) }}
+        </td></tr>
+        {% if not loop.last %}
+        <tr><td style="height:10px;"></td></tr>
+        {% endif %}
+        {% endfor %}
 
         <!-- ボタン -->
         <tr>
@@ -358,7 +326,7 @@ def render_card_grouped(
             <table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0">
               <tbody><tr>
                 <td style="background:#e8f0ff;border:1px solid #c7d2fe;border-radius:8px;">
-                  <a href="{_link_url}" target="_blank" rel="noopener noreferrer"
+                  <a href="{{ link_url }}" target="_blank" rel="noopener noreferrer"
                      style="display:block;width:100%;text-align:center;color:#1d4ed8;text-decoration:none;font:700 15px/1 Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;padding:12px 18px;border-radius:8px;">
                     記事を読む
                   </a>
@@ -369,65 +337,219 @@ def render_card_grouped(
         </tr>
       </tbody>
     </table>
+"""
+
+
+def _nl2br(text) -> Markup:
+    """Jinja用フィルタ：HTMLエスケープ + 改行を <br> に変換"""
+    return Markup(_esc(text))
+
+
+def _nl2br_cached(text) -> Markup:
+    """_nl2br のメモ化版（コメンテーター情報向け）"""
+    return Markup(_esc_cached(text or ""))
+
+
+# コンパイル済みテンプレートのバイトコード保存先（再起動後もパースを省略）
+_JINJA_CACHE_DIR = Path(__file__).with_name(".jinja_cache")
+
+
+@st.cache_resource(show_spinner=False)
+def _jinja_env(macros_tpl: str, card_tpl: str, grouped_tpl: str) -> Environment:
+    """
+    テンプレート環境をプロセス内で1つだけ作る（Streamlit の再実行ごとに作り直さない）。
+    テンプレート文字列を引数に取るので、編集すればキャッシュキーが変わり作り直される。
+    バイトコードはディスクにも保存し、コンテナ再起動後のコンパイルも省く。
     """
+    try:
+        _JINJA_CACHE_DIR.mkdir(exist_ok=True)
+    except OSError:
+        pass
+    # 書き込めない環境ではメモリ内キャッシュのみ（既存ディレクトリが読み取り専用の場合も含む）
+    if os.access(_JINJA_CACHE_DIR, os.W_OK):
+        bytecode_cache = FileSystemBytecodeCache(str(_JINJA_CACHE_DIR))
+    else:
+        bytecode_cache = None
+
+    env = Environment(
+        loader=DictLoader({"macros": macros_tpl, "card": card_tpl, "grouped": grouped_tpl}),
+        autoescape=True,
+        auto_reload=False,
+        cache_size=-1,
+        trim_blocks=True,
+        lstrip_blocks=True,
+        bytecode_cache=bytecode_cache,
+    )
+    env.filters["nl2br"] = _nl2br
+    env.filters["nl2br_cached"] = _nl2br_cached
+    return env
+
+
+CARD = _jinja_env(MACROS_TPL, CARD_TPL, GROUPED_TPL).get_template("card")
+GROUPED = _jinja_env(MACROS_TPL, CARD_TPL, GROUPED_TPL).get_template("grouped")
+
+# カード描画キャッシュのキーに含めるテンプレートの版（テンプレートを編集すると古い描画結果を使わない）
+TPL_SIG = hashlib.blake2b(
+    "\0".join((MACROS_TPL, CARD_TPL, GROUPED_TPL)).encode("utf-8"), digest_size=8
+).hexdigest()
+
+
+# =========================
+# HTMLレンダリング（単一カード）
+# =========================
+@st.cache_data(show_spinner=False, max_entries=64)
+def render_card(
+    idx: int,
+    issue_label: str,
+    article_title: str,
+    comment_text: str,
+    commenter_name: str,
+    commenter_org: str,
+    link_url: str,
+    strip_color: str,
+    monogram: Optional[str] = None,
+    comment_bar_color: str = "#2563eb",
+    commenter_bio: str = "",
+    tpl_sig: str = "",
+) -> str:
+    """1枚のカード（記事＋単一コメント）HTMLを返す。tpl_sig はキャッシュキー用（TPL_SIG を渡す）。"""
+    return CARD.render(
+        idx=idx,
+        issue_label=issue_label,
+        article_title=article_title,
+        comment_text=comment_text,
+        commenter_name=commenter_name,
+        commenter_org=commenter_org,
+        commenter_bio=commenter_bio,
+        link_url=(link_url or f"#article{idx+1}").strip(),
+        strip_color=strip_color or color_cycle(idx),
+        mono=(monogram or auto_monogram(commenter_name)).strip()[:1] or "名",
+        comment_bar_color=comment_bar_color,
+    )
+
+
+# =========================
+# HTMLレンダリング（複数コメントを1枚に集約）
+# =========================
+@st.cache_data(show_spinner=False, max_entries=64)
+def render_card_grouped(
+    idx: int,
+    issue_label: str,
+    article_title: str,
+    link_url: str,
+    strip_color: str,
+    entries: List[Entry],
+    tpl_sig: str = "",
+) -> str:
+    """同一記事の複数コメントを1枚にまとめたカードHTMLを返す。tpl_sig はキャッシュキー用（TPL_SIG を渡す）。"""
+    # 各エントリの表示値を1パスで確定させ、人数（ユニーク氏名）も同時に数える
+    prepped: List[Dict[str, str]] = []
+    seen_names: Dict[str, None] = {}
+    for e in entries:
+        name = e.name
+        seen_names.setdefault(name, None)
+        prepped.append(
+            {
+                "name": name,
+                "org": e.org,
+                "comment": e.comment,
+                "bio": e.bio,
+                "mono": (e.monogram or auto_monogram(name))[:1] or "名",
+                "bar": e.comment_bar_color or "#2563eb",
+            }
+        )
+
+    return GROUPED.render(
+        idx=idx,
+        issue_label=issue_label,
+        article_title=article_title,
+        link_url=(link_url or f"#article{idx+1}").strip(),
+        strip_color=strip_color or color_cycle(idx),
+        entries=prepped,
+        num_commentators=len(seen_names),
+    )
 
 
 # =========================
 # 同一記事をまとめる
 # =========================
+@st.cache_data(show_spinner=False, max_entries=64)
 def group_cards_by_article(rows: List[Dict[str, str]]) -> List[Dict[str, object]]:
     """
     rows: 単票のcards_data（既存構造）
-    return: [{issue, title, link, strip_color, entries:[...] }] の配列（順序保持）
+    return: [{issue, title, link, strip_color, entries:[Entry, ...] }] の配列（順序保持）
+
+    (issue, title, link) のタプルをキーにした dict で1パス集約する（O(N)）。
     """
-    buckets: "OrderedDict[tuple, Dict[str, object]]" = OrderedDict()
+    buckets: Dict[tuple, Dict[str, object]] = {}  # dict は挿入順を保持
     for r in rows:
-        key = (r.get("issue", "").strip(), r.get("title", "").strip(), r.get("link", "").strip())
-        if key not in buckets:
-            buckets[key] = {
-                "issue": r.get("issue", "").strip(),
-                "title": r.get("title", "").strip(),
-                "link": r.get("link", "").strip(),
+        issue = r.get("issue", "").strip()
+        title = r.get("title", "").strip()
+        link = r.get("link", "").strip()
+        key = (issue, title, link)
+        b = buckets.get(key)
+        if b is None:
+            b = buckets[key] = {
+                "issue": issue,
+                "title": title,
+                "link": link,
                 "strip_color": r.get("strip_color") or "#c7d2fe",
                 "entries": [],
             }
-        buckets[key]["entries"].append(
-            {
-                "comment": r.get("comment", ""),
-                "name": r.get("name", ""),
-                "org": r.get("org", ""),
-                "bio": r.get("bio", ""),
-                "monogram": r.get("monogram", ""),
-                "comment_bar_color": r.get("comment_bar_color", "#2563eb"),
-            }
+        b["entries"].append(
+            Entry(
+                comment=r.get("comment", ""),
+                name=r.get("name", ""),
+                org=r.get("org", ""),
+                bio=r.get("bio", ""),
+                monogram=r.get("monogram", ""),
+                comment_bar_color=r.get("comment_bar_color", "#2563eb"),
+            )
         )
-        if not buckets[key]["strip_color"]:
-            buckets[key]["strip_color"] = r.get("strip_color") or color_cycle(0)
     return list(buckets.values())
 
 
+def render_article_card(group: Dict[str, object], idx: int) -> str:
+    """
+    group_cards_by_article の1要素をカードHTMLにする。
+    コメントが1件だけなら、バッジやチップ列の無い単一カードで描画する。
+    """
+    entries: List[Entry] = group["entries"]
+    if len(entries) == 1:
+        e = entries[0]
+        return render_card(
+            idx=idx,
+            issue_label=group["issue"],
+            article_title=group["title"],
+            comment_text=e.comment,
+            commenter_name=e.name,
+            commenter_org=e.org,
+            link_url=group["link"],
+            strip_color=group["strip_color"],
+            monogram=e.monogram,
+            comment_bar_color=e.comment_bar_color,
+            commenter_bio=e.bio,
+            tpl_sig=TPL_SIG,
+        )
+    return render_card_grouped(
+        idx=idx,
+        issue_label=group["issue"],
+        article_title=group["title"],
+        link_url=group["link"],
+        strip_color=group["strip_color"],
+        entries=entries,
+        tpl_sig=TPL_SIG,
+    )
+
+
 # =========================
 # メール全体レンダリング
 # =========================
-def render_email_full(
-    title_text: str,
-    badge_text: str,
-    header_title: str,
-    delivery_text: str,
-    description_text: str,
-    cards: List[str],
-) -> str:
-    _title_text = escape_nl2br(title_text)
-    _badge_text = escape_nl2br(badge_text)
-    _header_title = escape_nl2br(header_title)
-    _delivery_text = escape_nl2br(delivery_text)
-    _description_text = escape_nl2br(description_text)
+# ヘッダ／フッタの静的部分はモジュール定数として1度だけ確保する
+_EMAIL_HDR_1 = """<meta charset="UTF-8">
+<title>"""
 
-    spacer = '<div style="height:18px;line-height:18px;">&nbsp;</div>'
-    body_cards_html = spacer.join(cards)
-
-    html_full = f"""<meta charset="UTF-8">
-<title>{_title_text}</title>
+_EMAIL_HDR_2 = """</title>
 
 <!-- 100% wrapper -->
 <table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0" style="margin:0;padding:0;background:#f3f6fb;">
@@ -444,20 +566,28 @@ def render_email_full(
                   <table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0">
                     <tbody><tr>
                       <td>
-                        <span style="display:inline-block;vertical-align:middle;background:#22315b;border:1px solid #2f3c66;color:#ffffff;font-weight:800;font-size:12px;letter-spacing:.04em;padding:7px 14px;border-radius:16px;font-family:Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">{_badge_text}</span>
-                        <span style="display:inline-block;vertical-align:middle;margin-left:12px;color:#ffffff;font-weight:800;font-size:22px;letter-spacing:.01em;font-family:Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">{_header_title}</span>
+                        <span style="display:inline-block;vertical-align:middle;background:#22315b;border:1px solid #2f3c66;color:#ffffff;font-weight:800;font-size:12px;letter-spacing:.04em;padding:7px 14px;border-radius:16px;font-family:Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">"""
+
+_EMAIL_HDR_3 = """</span>
+                        <span style="display:inline-block;vertical-align:middle;margin-left:12px;color:#ffffff;font-weight:800;font-size:22px;letter-spacing:.01em;font-family:Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">"""
+
+_EMAIL_HDR_4 = """</span>
                       </td>
                     </tr></tbody>
                   </table>
                   <table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0">
                     <tbody><tr>
-                      <td style="padding-top:8px;color:#dbeafe;font-size:14px;font-family:Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">{_delivery_text}</td>
+                      <td style="padding-top:8px;color:#dbeafe;font-size:14px;font-family:Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">"""
+
+_EMAIL_HDR_5 = """</td>
                     </tr></tbody>
                   </table>
                   <table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0">
                     <tbody><tr>
                       <td style="padding-top:6px;color:#c7d2fe;font-size:13px;line-height:1.7;font-family:Arial,'Hiragino Kaku Gothic ProN',Meiryo,sans-serif;">
-                        {_description_text}
+                        """
+
+_EMAIL_HDR_6 = """
                       </td>
                     </tr></tbody>
                   </table>
@@ -473,7 +603,9 @@ def render_email_full(
       <table role="presentation" width="900" cellpadding="0" cellspacing="0" border="0" style="max-width:900px;width:100%;background:#f3f6fb;">
         <tbody><tr>
           <td style="padding:24px;">
-            {body_cards_html}
+            """
+
+_EMAIL_FOOTER = """
           </td>
         </tr></tbody>
       </table>
@@ -499,7 +631,62 @@ def render_email_full(
   </tr></tbody>
 </table>
 """
-    return html_full
+
+_CARD_SPACER = '<div style="height:18px;line-height:18px;">&nbsp;</div>'
+
+# メール全体キャッシュのキーに含める枠HTMLの版
+EMAIL_TPL_SIG = hashlib.blake2b(
+    "\0".join(
+        (_EMAIL_HDR_1, _EMAIL_HDR_2, _EMAIL_HDR_3, _EMAIL_HDR_4, _EMAIL_HDR_5, _EMAIL_HDR_6, _EMAIL_FOOTER, _CARD_SPACER)
+    ).encode("utf-8"),
+    digest_size=8,
+).hexdigest()
+
+
+def iter_email_full(
+    title_text: str,
+    badge_text: str,
+    header_title: str,
+    delivery_text: str,
+    description_text: str,
+    cards: Iterable[str],
+) -> Iterator[str]:
+    """メール全体HTMLを断片ごとに yield する（文字列が必要なら "".join する）。"""
+    yield _EMAIL_HDR_1
+    yield _esc(title_text)
+    yield _EMAIL_HDR_2
+    yield _esc(badge_text)
+    yield _EMAIL_HDR_3
+    yield _esc(header_title)
+    yield _EMAIL_HDR_4
+    yield _esc(delivery_text)
+    yield _EMAIL_HDR_5
+    yield _esc(description_text)
+    yield _EMAIL_HDR_6
+
+    # カード間にスペーサーを挟む（中間の連結文字列は作らない）
+    for i, card in enumerate(cards):
+        if i:
+            yield _CARD_SPACER
+        yield card
+
+    yield _EMAIL_FOOTER
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def render_email_full(
+    title_text: str,
+    badge_text: str,
+    header_title: str,
+    delivery_text: str,
+    description_text: str,
+    cards: List[str],
+    tpl_sig: str = "",
+) -> str:
+    """メール全体HTMLを返す。tpl_sig はキャッシュキー用（EMAIL_TPL_SIG を渡す）。"""
+    return "".join(
+        iter_email_full(title_text, badge_text, header_title, delivery_text, description_text, cards)
+    )
 
 
 # =========================
@@ -512,11 +699,18 @@ st.caption("週次の入力内容をフォームで設定 → HTMLを生成・
 
 # コメンテーター：セッション初期化
 DEFAULT_COMMENTATORS = get_default_commentators()
-for i, c in enumerate(DEFAULT_COMMENTATORS):
-    ensure_state(f"cmt_name_{i}", c["name"])
-    ensure_state(f"cmt_org_{i}", c["org"])
-    ensure_state(f"cmt_bio_{i}", c["bio"])
-    ensure_state(f"cmt_mono_{i}", auto_monogram(c["name"]))
+ensure_states(
+    {
+        key: value
+        for i, c in enumerate(DEFAULT_COMMENTATORS)
+        for key, value in (
+            (f"cmt_name_{i}", c["name"]),
+            (f"cmt_org_{i}", c["org"]),
+            (f"cmt_bio_{i}", c["bio"]),
+            (f"cmt_mono_{i}", auto_monogram(c["name"])),
+        )
+    }
+)
 
 with st.sidebar:
     st.header("入力方法")
@@ -589,7 +783,7 @@ st.subheader("② コメンテーター設定（このセッション内で編
 st.caption("全コメンテーターがカード側のプルダウンに表示されます。ここでモノグラムも設定できます（1文字推奨）。")
 
 cols = st.columns(2)
-for i, base in enumerate(get_default_commentators()):
+for i, base in enumerate(DEFAULT_COMMENTATORS):
     with cols[i % 2]:
         with st.expander(
             f"{i+1}. {st.session_state[f'cmt_name_{i}']} / {st.session_state[f'cmt_org_{i}'] or '（所属未設定）'}",
@@ -601,7 +795,7 @@ for i, base in enumerate(get_default_commentators()):
             st.text_input("モノグラム（1文字推奨・未入力時は氏名から自動）", key=f"cmt_mono_{i}")
 
 ALL_COMMENTATORS: List[Dict[str, str]] = []
-for i, base in enumerate(get_default_commentators()):
+for i, base in enumerate(DEFAULT_COMMENTATORS):
     name_i = st.session_state[f"cmt_name_{i}"].strip()
     org_i = st.session_state[f"cmt_org_{i}"].strip()
     bio_i = st.session_state[f"cmt_bio_{i}"].strip()
@@ -622,57 +816,85 @@ st.subheader("③ カード設定（記事＋コメント）")
 
 cards_data: List[Dict[str, str]] = []
 
+# CSVで読み込む列（これ以外の列は無視）
+CSV_FIELDS = ("issue", "title", "comment", "name", "org", "link", "monogram", "strip_color", "commentator", "bio")
+CSV_COLUMNS = frozenset(CSV_FIELDS)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _parse_csv(_raw: bytes, sig: str) -> Tuple[List[str], List[Dict[str, str]]]:
+    """
+    アップロードCSVを（列名, strip 済みの行 dict）に変換。
+    キャッシュキーは sig（内容ハッシュ）のみで、同じファイルのままなら再実行時に読み直さない。
+    """
+    # 全列を文字列・欠損なしで読む（型推論と NaN 処理を省き、不要な列は読まない）
+    # ※ pyarrow エンジンは型推論後に str 化するため「0123」→「123」などになる。C エンジンのみを使う
+    df = pd.read_csv(
+        io.BytesIO(_raw),
+        dtype=str,
+        keep_default_na=False,
+        usecols=lambda c: c in CSV_COLUMNS,
+        engine="c",
+    )
+    # 念のため欠損を "" に寄せて全値を str にそろえ、strip は列単位でまとめて行う（以降は素の dict で回す）
+    df = df.fillna("").astype(str).apply(lambda s: s.str.strip())
+    return list(df.columns), df.to_dict(orient="records")
+
+
+def _csv_row_to_card(i: int, row: Dict[str, str]) -> Dict[str, str]:
+    """CSVの1行（strip 済みの文字列 dict）をカード行に変換。commentator 列で設定中のコメンテーターから補完。"""
+    # 任意列が無いCSVでも以降は vals[...] で引けるよう、1回でそろえる（値は _parse_csv で strip 済み）
+    vals = {f: row.get(f, "") for f in CSV_FIELDS}
+    commentator_token = vals["commentator"]
+    cmt_from_token = None
+    if commentator_token:
+        try:
+            token_id = int(float(commentator_token))
+            cmt_from_token = next((c for c in ALL_COMMENTATORS if c["id"] == token_id), None)
+        except Exception:
+            cmt_from_token = next((c for c in ALL_COMMENTATORS if c["name"] == commentator_token), None)
+
+    name_val = vals["name"]
+    org_val = vals["org"]
+    bio_val = vals["bio"]
+    mono_val = vals["monogram"]
+
+    if cmt_from_token:
+        if not name_val:
+            name_val = cmt_from_token["name"]
+        if not org_val:
+            org_val = cmt_from_token["org"]
+        if not bio_val:
+            bio_val = cmt_from_token.get("bio", "")
+        if not mono_val:
+            mono_val = cmt_from_token.get("mono", "")
+
+    mono_val = (mono_val[:1] or auto_monogram(name_val))
+
+    return {
+        "issue": vals["issue"],
+        "title": vals["title"],
+        "comment": vals["comment"],
+        "name": name_val,
+        "org": org_val,
+        "bio": bio_val,
+        "link": row.get("link", f"#article{i+1}"),
+        "monogram": mono_val,
+        "strip_color": vals["strip_color"],
+    }
+
+
 if input_mode == "CSVをアップロード":
     uploaded = st.file_uploader("CSVをアップロード", type=["csv"])
     if uploaded is not None:
-        import pandas as pd
-
         try:
-            df = pd.read_csv(uploaded)
+            raw = uploaded.getvalue()
+            columns, records = _parse_csv(raw, hashlib.blake2b(raw, digest_size=8).hexdigest())
             required_cols = {"issue", "title", "comment", "name", "org", "link"}
-            if not required_cols.issubset(df.columns):
+            if not required_cols.issubset(columns):
                 st.error(f"CSVに必要な列が不足しています: {sorted(required_cols)}")
             else:
-                for i, row in df.iterrows():
-                    commentator_token = str(row.get("commentator", "")).strip()
-                    cmt_from_token = None
-                    if commentator_token:
-                        try:
-                            token_id = int(float(commentator_token))
-                            cmt_from_token = next((c for c in ALL_COMMENTATORS if c["id"] == token_id), None)
-                        except Exception:
-                            cmt_from_token = next((c for c in ALL_COMMENTATORS if c["name"] == commentator_token), None)
-
-                    name_val = str(row.get("name", "")).strip()
-                    org_val = str(row.get("org", "")).strip()
-                    bio_val = str(row.get("bio", "")).strip()
-                    mono_val = str(row.get("monogram", "")).strip()
-
-                    if cmt_from_token:
-                        if not name_val:
-                            name_val = cmt_from_token["name"]
-                        if not org_val:
-                            org_val = cmt_from_token["org"]
-                        if not bio_val:
-                            bio_val = cmt_from_token.get("bio", "")
-                        if not mono_val:
-                            mono_val = cmt_from_token.get("mono", "")
-
-                    mono_val = (mono_val[:1] or auto_monogram(name_val))
-
-                    cards_data.append(
-                        {
-                            "issue": str(row.get("issue", "")).strip(),
-                            "title": str(row.get("title", "")).strip(),
-                            "comment": str(row.get("comment", "")).strip(),
-                            "name": name_val,
-                            "org": org_val,
-                            "bio": bio_val,
-                            "link": str(row.get("link", f"#article{i+1}")).strip(),
-                            "monogram": mono_val,
-                            "strip_color": str(row.get("strip_color", "")).strip(),
-                        }
-                    )
+                cards_data = [_csv_row_to_card(i, row) for i, row in enumerate(records)]
                 st.success(f"{len(cards_data)} 件のカードを読み込みました。右側でプレビュー可能です。")
         except Exception as e:
             st.error(f"CSVの読み込みに失敗しました: {e}")
@@ -682,73 +904,125 @@ else:
     comment_bar_color = st.color_picker("コメント左バー（既定）は #2563eb", value="#2563eb", key="bar")
     num_cards = st.number_input("カード数（コメント行の数）", min_value=1, max_value=40, value=7, step=1)
 
-    def _label(c): return f"{c['name']}（{c['org'] or '所属未設定'}）"
-    cmt_options = ["-- 手動入力 --"] + [_label(c) for c in ALL_COMMENTATORS]
-
-    for i in range(int(num_cards)):
-        with st.expander(f"カード（コメント行） {i+1}", expanded=(i == 0)):
-            col1, col2 = st.columns([1.0, 1.0])
-
-            with col1:
-                st.text_input("号数（例: 第3742号）", key=f"issue_{i}", value=f"第{3742+i}号")
-                st.text_input("記事タイトル", key=f"title_{i}", value="")
-                strip_color = st.color_picker("カード上部ストリップ色（同一記事で最初の行が採用）", value=color_cycle(i), key=f"strip_{i}")
-
-            with col2:
-                default_index = (i % len(ALL_COMMENTATORS)) + 1
-                selected_label = st.selectbox(
-                    "コメンテーター（選ぶと下へ反映／手動編集可）",
-                    options=cmt_options,
-                    index=min(default_index, len(cmt_options) - 1),
-                    key=f"cmt_select_{i}",
-                )
-                selected_cmt = None
-                if selected_label != cmt_options[0]:
-                    sel_idx = cmt_options.index(selected_label) - 1
-                    selected_cmt = ALL_COMMENTATORS[sel_idx]
-
-                name_key, org_key, bio_key, mono_key = f"name_{i}", f"org_{i}", f"bio_{i}", f"mono_{i}"
-
-                if selected_cmt:
-                    if not st.session_state.get(name_key, ""):
-                        st.session_state[name_key] = selected_cmt["name"]
-                    if not st.session_state.get(org_key, ""):
-                        st.session_state[org_key] = selected_cmt["org"]
-                    if not st.session_state.get(bio_key, ""):
-                        st.session_state[bio_key] = selected_cmt.get("bio", "")
-                    if not st.session_state.get(mono_key, ""):
-                        st.session_state[mono_key] = selected_cmt.get("mono", "") or auto_monogram(selected_cmt["name"])
-
-                if st.button("↑ 選択の内容で氏名・所属・略歴・モノグラムを上書き", key=f"apply_{i}") and selected_cmt:
+    @st.cache_data(show_spinner=False)
+    def _commentator_options(name_orgs: Tuple[Tuple[str, str], ...]) -> List[str]:
+        """プルダウンの選択肢（コメンテーターの氏名・所属が変わったときだけ作り直す）"""
+        return ["-- 手動入力 --"] + [f"{name}（{org or '所属未設定'}）" for name, org in name_orgs]
+
+    cmt_options = _commentator_options(tuple((c["name"], c["org"]) for c in ALL_COMMENTATORS))
+    # 選択ラベル → 選択肢の位置（同じラベルが複数あれば先頭を採用）
+    label_to_idx: Dict[str, int] = {}
+    for n, label in enumerate(cmt_options):
+        label_to_idx.setdefault(label, n)
+
+    def _card_editor(i: int, cmt_options: List[str], label_to_idx: Dict[str, int]) -> None:
+        """カード1枚分の入力欄（値はすべて session_state に入り、後段でまとめて読み出す）。"""
+        col1, col2 = st.columns([1.0, 1.0])
+
+        with col1:
+            st.text_input("号数（例: 第3742号）", key=f"issue_{i}")
+            st.text_input("記事タイトル", key=f"title_{i}")
+            # 色は既定の交互パレットで足りることが多いので、ピッカーは必要なときだけ出す
+            if st.checkbox("ストリップ色をカスタマイズ", key=f"strip_cust_{i}"):
+                st.color_picker("カード上部ストリップ色（同一記事で最初の行が採用）", key=f"strip_{i}")
+
+        with col2:
+            default_index = (i % len(ALL_COMMENTATORS)) + 1
+            selected_label = st.selectbox(
+                "コメンテーター（選ぶと下へ反映／手動編集可）",
+                options=cmt_options,
+                index=min(default_index, len(cmt_options) - 1),
+                key=f"cmt_select_{i}",
+            )
+            selected_cmt = None
+            if selected_label != cmt_options[0]:
+                sel_idx = label_to_idx[selected_label] - 1
+                selected_cmt = ALL_COMMENTATORS[sel_idx]
+
+            name_key, org_key, bio_key, mono_key = f"name_{i}", f"org_{i}", f"bio_{i}", f"mono_{i}"
+
+            # 同じ（カード, コメンテーター）の組では初回だけ空欄を埋める
+            prefill_flag = f"_prefilled_{i}_{selected_cmt['id'] if selected_cmt else ''}"
+            if selected_cmt and not st.session_state.get(prefill_flag):
+                st.session_state[prefill_flag] = True
+                if not st.session_state.get(name_key, ""):
                     st.session_state[name_key] = selected_cmt["name"]
+                if not st.session_state.get(org_key, ""):
                     st.session_state[org_key] = selected_cmt["org"]
+                if not st.session_state.get(bio_key, ""):
                     st.session_state[bio_key] = selected_cmt.get("bio", "")
+                if not st.session_state.get(mono_key, ""):
                     st.session_state[mono_key] = selected_cmt.get("mono", "") or auto_monogram(selected_cmt["name"])
 
-                st.text_input("氏名（例: 田中 太郎）", key=name_key)
-                st.text_input("所属（空欄可）", key=org_key)
-                st.text_area("略歴（カードに表示・任意）", key=bio_key, height=72)
-                st.text_input("モノグラム（任意・1文字推奨）", key=mono_key)
-                st.text_input("ボタンのリンク（#articleX または URL）", key=f"link_{i}", value=f"#article{i+1}")
-
-            st.text_area("コメント本文（複数行OK）", key=f"comment_{i}", value="💬 ")
-
-            mono_final = (st.session_state.get(f"mono_{i}", "") or auto_monogram(st.session_state.get(f"name_{i}", "")))[:1]
-
-            cards_data.append(
-                {
-                    "issue": st.session_state.get(f"issue_{i}", ""),
-                    "title": st.session_state.get(f"title_{i}", ""),
-                    "comment": st.session_state.get(f"comment_{i}", ""),
-                    "name": st.session_state.get(f"name_{i}", ""),
-                    "org": st.session_state.get(f"org_{i}", ""),
-                    "bio": st.session_state.get(f"bio_{i}", ""),
-                    "link": st.session_state.get(f"link_{i}", f"#article{i+1}"),
-                    "monogram": mono_final,
-                    "strip_color": strip_color,
-                    "comment_bar_color": comment_bar_color,
-                }
-            )
+            if st.button("↑ 選択の内容で氏名・所属・略歴・モノグラムを上書き", key=f"apply_{i}") and selected_cmt:
+                st.session_state[name_key] = selected_cmt["name"]
+                st.session_state[org_key] = selected_cmt["org"]
+                st.session_state[bio_key] = selected_cmt.get("bio", "")
+                st.session_state[mono_key] = selected_cmt.get("mono", "") or auto_monogram(selected_cmt["name"])
+                st.session_state.pop(prefill_flag, None)
+
+            st.text_input("氏名（例: 田中 太郎）", key=name_key)
+            st.text_input("所属（空欄可）", key=org_key)
+            st.text_area("略歴（カードに表示・任意）", key=bio_key, height=72)
+            st.text_input("モノグラム（任意・1文字推奨）", key=mono_key)
+            st.text_input("ボタンのリンク（#articleX または URL）", key=f"link_{i}")
+
+        st.text_area("コメント本文（複数行OK）", key=f"comment_{i}")
+
+    def _open_card(i: int) -> None:
+        st.session_state[f"touched_{i}"] = True
+
+    # 既定値は session_state に直接入れておく（入力欄を一度も開いていないカードもこの値でHTML化される）
+    card_defaults: Dict[str, object] = {}
+    for i in range(int(num_cards)):
+        base = ALL_COMMENTATORS[i % len(ALL_COMMENTATORS)]
+        card_defaults.update(
+            {
+                f"touched_{i}": i == 0,
+                f"issue_{i}": f"第{3742+i}号",
+                f"title_{i}": "",
+                f"strip_{i}": color_cycle(i),
+                f"name_{i}": base["name"],
+                f"org_{i}": base["org"],
+                f"bio_{i}": base.get("bio", ""),
+                f"mono_{i}": base.get("mono", "") or auto_monogram(base["name"]),
+                f"link_{i}": f"#article{i+1}",
+                f"comment_{i}": "💬 ",
+            }
+        )
+    ensure_states(card_defaults)
+
+    # 入力欄は「編集する」を押したカードだけ生成し、初回表示のウィジェット数を抑える
+    for i in range(int(num_cards)):
+        touched = st.session_state[f"touched_{i}"]
+        with st.expander(f"カード（コメント行） {i+1}", expanded=touched):
+            if touched:
+                _card_editor(i, cmt_options, label_to_idx)
+            else:
+                st.caption(
+                    f"{st.session_state[f'issue_{i}']} / {st.session_state[f'name_{i}']}（既定値で出力されます）"
+                )
+                st.button("このカードを編集", key=f"open_{i}", on_click=_open_card, args=(i,))
+
+    # 入力値は各入力欄の key で session_state に入るので、ここで必要なキーだけ読み出す
+    ss = st.session_state
+    for i in range(int(num_cards)):
+        mono_final = (ss.get(f"mono_{i}", "") or auto_monogram(ss.get(f"name_{i}", "")))[:1]
+
+        cards_data.append(
+            {
+                "issue": ss.get(f"issue_{i}", ""),
+                "title": ss.get(f"title_{i}", ""),
+                "comment": ss.get(f"comment_{i}", ""),
+                "name": ss.get(f"name_{i}", ""),
+                "org": ss.get(f"org_{i}", ""),
+                "bio": ss.get(f"bio_{i}", ""),
+                "link": ss.get(f"link_{i}", f"#article{i+1}"),
+                "monogram": mono_final,
+                "strip_color": (ss.get(f"strip_cust_{i}") and ss.get(f"strip_{i}")) or color_cycle(i),
+                "comment_bar_color": comment_bar_color,
+            }
+        )
 
 # ④ 生成・プレビュー・ダウンロード
 st.subheader("④ 生成・プレビュー・ダウンロード")
@@ -758,37 +1032,26 @@ st.caption("※ 同一記事（号数＋タイトル＋リンク）が複数行
 use_grouping = st.checkbox("同一記事を1枚にまとめる", value=True)
 
 # カードHTMLを構築
-cards_html_list: List[str] = []
 if use_grouping:
-    grouped = group_cards_by_article(cards_data)
-    for idx, g in enumerate(grouped):
-        cards_html_list.append(
-            render_card_grouped(
-                idx=idx,
-                issue_label=g["issue"],
-                article_title=g["title"],
-                link_url=g["link"],
-                strip_color=g["strip_color"],
-                entries=g["entries"],
-            )
-        )
+    cards_html_list = [render_article_card(g, idx) for idx, g in enumerate(group_cards_by_article(cards_data))]
 else:
-    for idx, c in enumerate(cards_data):
-        cards_html_list.append(
-            render_card(
-                idx=idx,
-                issue_label=c.get("issue", ""),
-                article_title=c.get("title", ""),
-                comment_text=c.get("comment", ""),
-                commenter_name=c.get("name", ""),
-                commenter_org=c.get("org", ""),
-                link_url=c.get("link", f"#article{idx+1}"),
-                strip_color=c.get("strip_color") or color_cycle(idx),
-                monogram=c.get("monogram", ""),
-                comment_bar_color=c.get("comment_bar_color", "#2563eb"),
-                commenter_bio=c.get("bio", ""),
-            )
+    cards_html_list = [
+        render_card(
+            idx=idx,
+            issue_label=c.get("issue", ""),
+            article_title=c.get("title", ""),
+            comment_text=c.get("comment", ""),
+            commenter_name=c.get("name", ""),
+            commenter_org=c.get("org", ""),
+            link_url=c.get("link", f"#article{idx+1}"),
+            strip_color=c.get("strip_color") or color_cycle(idx),
+            monogram=c.get("monogram", ""),
+            comment_bar_color=c.get("comment_bar_color", "#2563eb"),
+            commenter_bio=c.get("bio", ""),
+            tpl_sig=TPL_SIG,
         )
+        for idx, c in enumerate(cards_data)
+    ]
 
 # 全体HTML
 full_html = render_email_full(
@@ -798,6 +1061,7 @@ full_html = render_email_full(
     delivery_text=delivery_text,
     description_text=description_text,
     cards=cards_html_list if cards_html_list else ["<!-- No cards -->"],
+    tpl_sig=EMAIL_TPL_SIG,
 )
 
 # 2カラム：左=ソース/ダウンロード、右=プレビュー
@@ -805,26 +1069,39 @@ lc, rc = st.columns([1.0, 1.1])
 
 with lc:
     st.markdown("**生成されたHTML（コピー用）**")
-    st.text_area("HTMLソース", value=full_html, height=420, label_visibility="collapsed")
+    # 数十KBのソースを毎回ブラウザへ送らないよう、表示は必要なときだけ
+    # （st.expander は閉じていても中身を送信するため checkbox で切り替える）
+    if st.checkbox("HTMLソースを表示", value=False, key="show_source"):
+        st.text_area("HTMLソース", value=full_html, height=420, label_visibility="collapsed")
 
     fname = f"comment_clip_{delivery_date.strftime('%Y%m%d')}.html"
     st.download_button(
         "HTMLファイルをダウンロード",
-        data=full_html.encode("utf-8"),
+        data=full_html.encode("utf-8"),  # エンコードはダウンロードボタン用のこの1回だけ
         file_name=fname,
         mime="text/html",
         use_container_width=True,
     )
 
-with rc:
-    st.markdown("**プレビュー（ブラウザ描画）**")
-    # まとめるとカード1枚の高さが上がるのでやや多めに確保
-    preview_height = 520 + max(0, len(cards_html_list)) * 320
+
+def _preview(full_html: str, height: int) -> None:
+    """プレビュー iframe（描画に失敗してもダウンロードは続けられるようにする）。"""
     try:
-        st_html(full_html, height=min(max(preview_height, 600), 2400), scrolling=True)
+        st_html(full_html, height=height, scrolling=True)
     except Exception:
         st.info("プレビュー表示に失敗しましたが、HTML自体はダウンロードできます。")
 
+
+with rc:
+    st.markdown("**プレビュー（ブラウザ描画）**")
+    # 編集中は iframe を組み立てないよう、プレビューは表示を選んだときだけ描く
+    if st.toggle("プレビュー表示", value=False, key="show_preview"):
+        # まとめるとカード1枚の高さが上がるのでやや多めに確保（600〜2400px）
+        preview_height = min(max(520 + len(cards_html_list) * 320, 600), 2400)
+        _preview(full_html, preview_height)
+    else:
+        st.caption("「プレビュー表示」をオンにすると、ここにメールの見た目を表示します。")
+
 st.markdown("---")
 with st.expander("使い方メモ", expanded=False):
     st.markdown(
@@ -832,6 +1109,6 @@ with st.expander("使い方メモ", expanded=False):
 1. **基本設定**でバッジ名・ヘッダー・配信日・説明文を入力します。  
 2. **コメンテーター設定**で氏名・所属・略歴・モノグラムを編集します。  
 3. **カード設定**で、同じ記事（号数＋タイトル＋リンク）のコメント行を複数作成すると、④で**1枚に自動統合**されます。  
-4. 右側でプレビューを確認し、**HTMLファイルをダウンロード**してください。  
+4. 右側の「プレビュー表示」をオンにして確認し、**HTMLファイルをダウンロード**してください。  
         """.strip()
     )